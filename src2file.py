@@ -1,10 +1,26 @@
 #!/usr/bin/env python3
 import os
 import sys
+import stat
+import re
 import argparse
 import fnmatch
+import functools
+from collections import deque
+from concurrent.futures import ThreadPoolExecutor
 
 MAX_FILE_SIZE = 350 * 1024  # 350KB limit 
+READ_BLOCK_SIZE = 256 * 1024
+BINARY_SNIFF_SIZE = 8192
+OUTPUT_BUFFER_SIZE = 1024 * 1024
+# File reads are IO-bound (os.read releases the GIL), so use more threads than cores
+READ_WORKERS = min(32, (os.cpu_count() or 1) * 4)
+
+# Raw read-only open; O_BINARY only exists (and matters) on Windows
+_READ_FLAGS = os.O_RDONLY | getattr(os, 'O_BINARY', 0) | getattr(os, 'O_CLOEXEC', 0)
+
+# fnmatch compares through os.path.normcase, which folds case on Windows
+_IGNORE_FLAGS = re.IGNORECASE if os.path.normcase('A') == 'a' else 0
 
 DEFAULT_EXTENSIONS = {
     # -- Scripting & Backend (Python, Ruby, PHP, etc) --
@@ -41,224 +57,453 @@ def sanitize_filename(name):
 def normalize_ext(ext_list):
     return {e.lstrip('.').lower() for e in ext_list}
 
-def load_gitignore(folder_path, root_dir):
+def load_gitignore(folder_path, rel_parent):
     """
-    Loads .gitignore from folder_path and rebases rules to be relative to root_dir.
+    Loads .gitignore from folder_path and rebases rules to be relative to the root.
+    rel_parent is folder_path relative to the root, '/'-separated ('' for the root itself).
     """
-    patterns = []
     gitignore_path = os.path.join(folder_path, '.gitignore')
-    
-    if not os.path.isfile(gitignore_path):
-        return patterns
 
     try:
-        rel_parent = os.path.relpath(folder_path, root_dir).replace(os.sep, '/')
-        
-        if rel_parent == '.': 
-            rel_parent = ''        
+        st = os.stat(gitignore_path)
+    except OSError:
+        return ()
 
-        with open(gitignore_path, 'r', encoding='utf-8') as f:
-            for line in f:
-                line = line.split('#')[0].strip()
-                if not line: 
-                    continue
-                
-                # We check the "body" of the pattern (ignoring trailing slash).
-                # 'src/temp' -> body is 'src/temp' (Has slash -> Anchored)
-                # 'dist/' -> body is 'dist' (No slash -> Recursive)
-                if '/' in line.rstrip('/'):
-                    # Anchored Logic: Preserve structure (keep trailing slash if present)
-                    clean_line = line.lstrip('/')
-                    if rel_parent:
-                        rebased = f"/{rel_parent}/{clean_line}"
-                    else:
-                        rebased = f"/{clean_line}"
-                    patterns.append(rebased)
+    if not stat.S_ISREG(st.st_mode):
+        return ()
+
+    return _parse_gitignore(gitignore_path, rel_parent, st.st_mtime_ns, st.st_size)
+
+@functools.lru_cache(maxsize=4096)
+def _parse_gitignore(gitignore_path, rel_parent, mtime_ns, size):
+    """
+    Parses a .gitignore file. mtime_ns and size are only part of the cache key,
+    so an edited file is parsed again.
+    """
+    patterns = []
+
+    try:
+        data = read_bytes(gitignore_path, size)
+
+        # Filter as bytes and decode only the surviving lines (usually plain ASCII)
+        for bline in data.splitlines():
+            bline = bline.split(b'#', 1)[0].strip()
+            if not bline: 
+                continue
+            line = bline.decode('utf-8', errors='replace')
+            
+            # We check the "body" of the pattern (ignoring trailing slash).
+            # 'src/temp' -> body is 'src/temp' (Has slash -> Anchored)
+            # 'dist/' -> body is 'dist' (No slash -> Recursive)
+            if '/' in line.rstrip('/'):
+                # Anchored Logic: Preserve structure (keep trailing slash if present)
+                clean_line = line.lstrip('/')
+                if rel_parent:
+                    rebased = f"/{rel_parent}/{clean_line}"
                 else:
-                    # Recursive Logic: Strip slash to allow simple name matching
-                    patterns.append(line.rstrip('/'))
+                    rebased = f"/{clean_line}"
+                patterns.append(rebased)
+            else:
+                # Recursive Logic: Strip slash to allow simple name matching
+                patterns.append(line.rstrip('/'))
     except Exception:
         pass
         
-    return patterns
+    # Cached results are shared, so hand out an immutable tuple
+    return tuple(patterns)
 
-def is_ignored(rel_path, ignore_patterns, *, is_dir=False):
-    name = os.path.basename(rel_path)
-    
-    for pattern in ignore_patterns:
-        if pattern.endswith('/'):
-            norm_pattern = pattern.rstrip('/')
-            clean_norm = norm_pattern.lstrip('/')
-            
-            # Exact Match (e.g. 'node_modules' matches '/src/node_modules/')
-            if is_dir and rel_path == clean_norm:
-                return True
-            # Inside Match (e.g. file inside node_modules)
-            if rel_path.startswith(clean_norm + '/'):
-                return True
-                
-        elif pattern.startswith('/'):
-            clean_pattern = pattern.lstrip('/')
-            if fnmatch.fnmatch(rel_path, clean_pattern):
-                return True
-                    
-        else:
-            if fnmatch.fnmatch(name, pattern):
-                return True
-            # Check full path match for standard patterns
-            if fnmatch.fnmatch(rel_path, pattern):
-                return True
-    return False
-
-def process_file(filepath, rel_path, verbose=False):
+# Specs are rebuilt for every directory with its own .gitignore; caching the
+# translation means only the child's new patterns are translated each time
+_translate = functools.lru_cache(maxsize=None)(fnmatch.translate)
+
+def _has_glob(pattern):
+    return any(c in pattern for c in '*?[')
+
+def _union(parts):
+    # Translations are cached, and on Python < 3.11 they contain named groups
+    # ('(?P<g0>...)'), so the same translation twice in one regex would redefine
+    # a group name. Drop duplicates (keeping order) before joining.
+    parts = list(dict.fromkeys(parts))
+    # An empty alternation would match everything, so fall back to a never-matching regex
+    return re.compile('|'.join(f"(?:{p})" for p in parts) if parts else r'(?!)', _IGNORE_FLAGS)
+
+class CompiledIgnore:
     """
-    Read file content or return None if binary/unreadable.
+    A set of ignore patterns fused into three regexes, so each check is a single match.
+    Plain names ('vendor') and suffix globs ('*.min.js') skip the regexes entirely.
+    """
+    __slots__ = ('patterns', 'exact_names', 'suffixes', 'name_re', 'path_re', 'dir_re')
+
+    def __init__(self, patterns):
+        self.patterns = patterns
+        exact_names, suffixes = set(), []
+        name_parts, path_parts, dir_parts = [], [], []
+
+        # A pattern repeated across .gitignore files (or via -i) only needs checking once
+        for pattern in dict.fromkeys(patterns):
+            if pattern.endswith('/'):
+                clean_norm = pattern.rstrip('/').lstrip('/')
+                # These were plain ==/startswith comparisons, so keep them case-sensitive
+                # even where the unions fold case: (?-i:...) switches IGNORECASE off locally
+                # Exact Match (e.g. 'node_modules' matches '/src/node_modules/')
+                dir_parts.append(f"(?-i:{re.escape(clean_norm)})" + r'\Z')
+                # Inside Match (e.g. file inside node_modules)
+                path_parts.append(f"(?-i:{re.escape(clean_norm + '/')})")
+
+            elif pattern.startswith('/'):
+                path_parts.append(_translate(pattern.lstrip('/')))
+
+            # Without a slash in the pattern, a full path match implies a name match,
+            # so these need only the name. Case-folding platforms stay on the regexes.
+            elif not _IGNORE_FLAGS and '/' not in pattern and not _has_glob(pattern):
+                exact_names.add(pattern)
+
+            elif not _IGNORE_FLAGS and pattern.startswith('*') and '/' not in pattern and not _has_glob(pattern[1:]):
+                suffixes.append(pattern[1:])
+
+            else:
+                # Standard patterns match either the name or the full path
+                translated = _translate(pattern)
+                # A basename has no '/', so only slash-free patterns can match it
+                if '/' not in pattern or '[' in pattern:
+                    name_parts.append(translated)
+                path_parts.append(translated)
+
+        self.exact_names = frozenset(exact_names)
+        self.suffixes = tuple(suffixes)
+        self.name_re = _union(name_parts)
+        self.path_re = _union(path_parts)
+        self.dir_re = _union(dir_parts)
+
+    def extend(self, patterns):
+        """Returns a spec with extra patterns appended (or self, if there are none)."""
+        if not patterns:
+            return self
+        return compile_ignore(self.patterns + tuple(patterns))
+
+@functools.lru_cache(maxsize=None)
+def compile_ignore(patterns):
+    return CompiledIgnore(patterns)
+
+def is_ignored(rel_path, ignore_spec, *, is_dir=False, name=None):
+    if name is None:
+        name = os.path.basename(rel_path)
+
+    # O(1) set lookup and a C-level endswith before any regex work
+    if name in ignore_spec.exact_names or name.endswith(ignore_spec.suffixes):
+        return True
+    if ignore_spec.name_re.match(name) or ignore_spec.path_re.match(rel_path):
+        return True
+    return is_dir and ignore_spec.dir_re.match(rel_path) is not None
+
+def is_text_file(filepath, rel_path, verbose=False):
+    """
+    Return False if the file is binary/unreadable, judging by its first 8KB.
     """
     try:
-        # Read entire file into memory (needed for context anyway)
-        with open(filepath, 'rb') as f:
-            content_bytes = f.read()
+        fd = os.open(filepath, _READ_FLAGS)
+        try:
+            head = os.read(fd, BINARY_SNIFF_SIZE)
+        finally:
+            os.close(fd)
+    except Exception as e:
+        if verbose: print(f"Error reading {rel_path}: {e}")
+        return False
 
-        # Inline binary check: Look for null byte in first 8KB
-        if b'\0' in content_bytes[:8192]:
-            if verbose: print(f"Skipping binary file: {rel_path}")
-            return None
+    # Look for null byte in first 8KB
+    if b'\0' in head:
+        if verbose: print(f"Skipping binary file: {rel_path}")
+        return False
 
-        return content_bytes.decode('utf-8', errors='replace')
-        
+    return True
+
+def read_bytes(filepath, size):
+    """
+    Read up to `size` bytes (the size from the scan's stat) with raw os.read calls.
+    Anything the file grew by since then is left out, so MAX_FILE_SIZE still holds.
+    """
+    # Plain open() would build a BufferedReader with an 8KB (io.DEFAULT_BUFFER_SIZE) buffer
+    fd = os.open(filepath, _READ_FLAGS)
+    try:
+        # Normally a single syscall; loop only on short reads
+        data = os.read(fd, size)
+        if len(data) == size or not data:
+            return data
+
+        chunks = [data]
+        remaining = size - len(data)
+        while remaining:
+            chunk = os.read(fd, min(remaining, READ_BLOCK_SIZE))
+            if not chunk:
+                break
+            chunks.append(chunk)
+            remaining -= len(chunk)
+        return b''.join(chunks)
+    finally:
+        os.close(fd)
+
+def process_file(filepath, rel_path, size, verbose=False):
+    """
+    Read file content as UTF-8 bytes or return None if unreadable.
+    """
+    try:
+        content_bytes = read_bytes(filepath, size)
     except Exception as e:
         if verbose: print(f"Error reading {rel_path}: {e}")
         return None
 
-def scan_directory(current_dir, root_dir, ignore_context, allowed_extensions, collected, verbose=False):
+    try:
+        # Valid UTF-8 (the common case) goes to the output untouched
+        content_bytes.decode('utf-8')
+        return content_bytes
+    except UnicodeDecodeError:
+        return content_bytes.decode('utf-8', errors='replace').encode('utf-8')
+
+def literal_names(patterns):
     """
-    Recursively traverse directories and collect files.
+    Returns the patterns that are plain names (no glob or slash), e.g. 'node_modules'.
     """
-    # Combine inherited ignore patterns with local .gitignore rules
-    ignore_patterns = ignore_context + load_gitignore(current_dir, root_dir)
+    return frozenset(p for p in patterns if '/' not in p and not _has_glob(p))
+
+def _dir_sort_key(entry):
+    # Directory 'a' sorts as 'a/', the prefix of everything inside it, so a
+    # depth-first walk emits paths in the same order as sorting them as strings
+    return entry.name + '/' if entry.is_dir(follow_symlinks=False) else entry.name
 
+def _list_directory(current_dir, verbose=False):
+    """
+    List a directory's non-hidden entries sorted for the depth-first walk;
+    empty if it can't be read.
+    """
     try:
         with os.scandir(current_dir) as entries:
-            # Sort for deterministic order
-            entries = sorted(list(entries), key=lambda e: e.name)
-            
-            for entry in entries:
-                if entry.name.startswith('.'): continue
-                
-                if entry.is_symlink():
-                    if verbose: print(f"Skipping symlink: {entry.name}")
-                    continue
-
-                # Calculate relative path and normalize to /
-                rel_path = os.path.relpath(entry.path, root_dir).replace(os.sep, '/')
-                
-                # --- Directory Handling ---
-                if entry.is_dir():
-                    if is_ignored(rel_path, ignore_patterns, is_dir=True):
-                        continue
-                    scan_directory(entry.path, root_dir, ignore_patterns, allowed_extensions, collected, verbose)
-                
-                # --- File Handling ---
-                elif entry.is_file():
-                    if is_ignored(rel_path, ignore_patterns, is_dir=False):
-                        continue
-
-                    try:
-                        if entry.stat().st_size > MAX_FILE_SIZE:
-                            if verbose: print(f"Skipping large file ({entry.stat().st_size} bytes): {rel_path}")
-                            continue
-                    except OSError:
-                        continue
-                    
-                    # Extension Check
-                    parts = entry.name.rsplit('.', 1)
-                    ext = parts[1].lower() if len(parts) > 1 else ""
-                    is_allowed = (entry.name.lower() in allowed_extensions) or (ext in allowed_extensions)
-                    
-                    if not is_allowed:
-                        continue
-
-                    # Process Content
-                    content = process_file(entry.path, rel_path, verbose)
-                    if content is not None:
-                        collected.append((rel_path, content))
-
+            # Hidden entries (.git, .venv, ...) are dropped here so they never reach the sort key
+            return sorted((e for e in entries if not e.name.startswith('.')), key=_dir_sort_key)
     except PermissionError:
         if verbose: print(f"Permission denied: {current_dir}")
     except OSError as e:
         if verbose: print(f"Error scanning {current_dir}: {e}")
+    return []
+
+def scan_directory(root_dir, ignore_context, literal_dir_names, allowed_extensions, paths, sizes, verbose=False):
+    """
+    Traverse directories depth-first with an explicit stack and collect files
+    into the parallel paths/sizes lists, in sorted path order.
+    """
+    # Dotted suffixes for a single endswith() call per file
+    ext_suffixes = tuple('.' + e for e in allowed_extensions if e and '.' not in e)
+
+    # Each open directory is a frame of (remaining entries, '/'-separated path
+    # prefix relative to root_dir, ignore spec incl. its own .gitignore)
+    def _frame(current_dir, rel_dir, inherited_spec):
+        # Combine inherited ignore spec with local .gitignore rules
+        ignore_spec = inherited_spec.extend(load_gitignore(current_dir, rel_dir))
+        rel_prefix = rel_dir + '/' if rel_dir else ''
+        return iter(_list_directory(current_dir, verbose)), rel_prefix, ignore_spec
+
+    stack = [_frame(root_dir, '', ignore_context)]
+
+    # Hot loop: bind bound methods to locals once instead of looking them up per entry
+    push = stack.append
+    append_path = paths.append
+    append_size = sizes.append
+
+    while stack:
+        entries, rel_prefix, ignore_spec = stack[-1]
+
+        for entry in entries:
+            name = entry.name
 
-def generate_tree(file_paths):
-    """Generates a visual directory tree."""
-    tree = {}
-    for path in file_paths:
-        parts = path.split('/')
-        current = tree
-        for part in parts:
-            current = current.setdefault(part, {})
+            # Prune well-known directories by name before doing any path work
+            if name in literal_dir_names and entry.is_dir(follow_symlinks=False):
+                continue
+        
+            if entry.is_symlink():
+                if verbose: print(f"Skipping symlink: {name}")
+                continue
+
+            # Relative path built from the parent's, already normalized to /
+            rel_path = rel_prefix + name
+        
+            # --- Directory Handling ---
+            if entry.is_dir(follow_symlinks=False):
+                if is_ignored(rel_path, ignore_spec, is_dir=True, name=name):
+                    continue
+                # Descend now; the rest of this directory resumes once the child is done
+                push(_frame(entry.path, rel_path, ignore_spec))
+                break
+        
+            # --- File Handling ---
+            elif entry.is_file(follow_symlinks=False):
+                # Extension Check (whole names cover e.g. 'makefile', 'dockerfile')
+                name_lower = name.lower()
+                if not (name_lower in allowed_extensions or name_lower.endswith(ext_suffixes)):
+                    continue
+
+                if is_ignored(rel_path, ignore_spec, is_dir=False, name=name):
+                    continue
+
+                # Stat only files that passed the name checks; symlinks are already excluded above
+                try:
+                    size = entry.stat(follow_symlinks=False).st_size
+                except OSError:
+                    continue
 
+                if size > MAX_FILE_SIZE:
+                    if verbose: print(f"Skipping large file ({size} bytes): {rel_path}")
+                    continue
+
+                # Binary check and content reads happen later, in parallel
+                append_path(rel_path)
+                append_size(size)
+        else:
+            # Directory exhausted
+            stack.pop()
+
+def add_to_tree(tree, rel_path):
+    """Inserts a file path into the nested dict used by render_tree."""
+    current = tree
+    for part in rel_path.split('/'):
+        current = current.setdefault(part, {})
+
+def _sorted_children(node):
+    # Reversed, so popping from the end yields keys in display order
+    return sorted(node.items(), key=lambda kv: kv[0].lower())[::-1]
+
+def render_tree(tree):
+    """Renders a visual directory tree."""
     lines = []
-    def _draw(current_level, prefix=""):
-        # Sort keys
-        keys = sorted(current_level.keys(), key=lambda k: k.lower())
-        for i, key in enumerate(keys):
-            is_last = (i == len(keys) - 1)
-            connector = "└── " if is_last else "├── "
-            
-            if len(current_level[key]) > 0:
-                lines.append(f"{prefix}{connector}{key}/")
-                extension = "    " if is_last else "│   "
-                _draw(current_level[key], prefix + extension)
-            else:
-                lines.append(f"{prefix}{connector}{key}")
-    _draw(tree)
+    stack = [(_sorted_children(tree), "")]
+
+    while stack:
+        children, prefix = stack[-1]
+        if not children:
+            stack.pop()
+            continue
+
+        key, node = children.pop()
+        is_last = not children
+        connector = "└── " if is_last else "├── "
+        
+        if node:
+            lines.append(f"{prefix}{connector}{key}/")
+            extension = "    " if is_last else "│   "
+            stack.append((_sorted_children(node), prefix + extension))
+        else:
+            lines.append(f"{prefix}{connector}{key}")
     return "\n".join(lines)
 
-def collect_files(root_dir, allowed_extensions, base_ignore_patterns, verbose=False):
-    collected = []
+def collect_files(root_dir, allowed_extensions, base_ignore_patterns, verbose=False, output_path=None):
+    # Kept as parallel lists rather than (path, size) tuples
+    paths = []
+    sizes = []
     
     if verbose:
         print(f"Scanning {root_dir}...")
 
     scan_directory(
-        current_dir=root_dir,
         root_dir=root_dir, 
-        ignore_context=base_ignore_patterns, 
+        ignore_context=compile_ignore(tuple(base_ignore_patterns)),
+        literal_dir_names=literal_names(base_ignore_patterns),
         allowed_extensions=allowed_extensions, 
-        collected=collected, 
+        paths=paths,
+        sizes=sizes,
         verbose=verbose
     )
-    
-    return collected
 
-def save_to_file(files, output_path, root_dir_name):
-    if not files:
+    # The walk already emits paths in sorted order, so no sort pass is needed
+    if verbose:
+        assert paths == sorted(paths), "scan_directory emitted paths out of order"
+
+    # The output is truncated before contents are read, so if it lives inside the
+    # scanned tree (the default for `src2file .`) we'd read our own partial output
+    if output_path is not None:
+        out_rel = os.path.relpath(os.path.realpath(output_path), os.path.realpath(root_dir))
+        out_rel = out_rel.replace(os.sep, '/')
+        if out_rel in paths:
+            if verbose: print(f"Skipping output file: {out_rel}")
+            i = paths.index(out_rel)
+            del paths[i]
+            del sizes[i]
+
+    # Drop binary/unreadable files, sniffing their heads in parallel
+    with ThreadPoolExecutor(max_workers=READ_WORKERS) as executor:
+        is_text = executor.map(
+            lambda p: is_text_file(os.path.join(root_dir, p), p, verbose), paths
+        )
+        kept_paths = []
+        kept_sizes = []
+        tree = {}
+        for i, keep in enumerate(is_text):
+            if keep:
+                kept_paths.append(paths[i])
+                kept_sizes.append(sizes[i])
+                add_to_tree(tree, paths[i])
+
+    return kept_paths, kept_sizes, tree
+
+def read_ahead(executor, fn, items, depth):
+    """
+    Ordered like executor.map, but with at most `depth` results held in memory.
+    """
+    pending = deque()
+    for item in items:
+        pending.append(executor.submit(fn, item))
+        if len(pending) >= depth:
+            yield pending.popleft().result()
+    while pending:
+        yield pending.popleft().result()
+
+def save_to_file(paths, sizes, tree, root_dir, output_path, root_dir_name, verbose=False):
+    if not paths:
         print("No files found matching criteria.")
         return
 
-    files.sort(key=lambda x: x[0])
+    written = 0
+    missing = 0
     
-    with open(output_path, 'w', encoding='utf-8') as outfile:
+    with open(output_path, 'wb', buffering=OUTPUT_BUFFER_SIZE) as outfile:
         # 1. Write Tree
-        outfile.write(f"Project: {root_dir_name}\n")
-        outfile.write("=" * 50 + "\n")
-        outfile.write("PROJECT STRUCTURE:\n")
-        outfile.write(generate_tree([f[0] for f in files]))
-        outfile.write("\n" + "=" * 50 + "\n\n")
-
-        # 2. Write Content
-        for rel_path, content in files:
-            outfile.write(f"FILE: {rel_path}\n")
-            outfile.write("-" * 20 + "\n")
-            outfile.write(content)
-            if not content.endswith('\n'):
-                outfile.write('\n')
-            outfile.write("\n" + "=" * 50 + "\n\n")
+        header = (
+            f"Project: {root_dir_name}\n"
+            + "=" * 50 + "\n"
+            + "PROJECT STRUCTURE:\n"
+            + render_tree(tree)
+            + "\n" + "=" * 50 + "\n\n"
+        )
+        outfile.write(header.encode('utf-8'))
+
+        # 2. Stream Content, reading a bounded window of files ahead in parallel
+        def _read(i):
+            return process_file(os.path.join(root_dir, paths[i]), paths[i], sizes[i], verbose)
+
+        file_footer = ("\n" + "=" * 50 + "\n\n").encode('utf-8')
+
+        with ThreadPoolExecutor(max_workers=READ_WORKERS) as executor:
+            contents = read_ahead(executor, _read, range(len(paths)), depth=READ_WORKERS * 2)
+
+            for rel_path, content in zip(paths, contents):
+                # Known race: the tree was built from the sniff pass in collect_files, so a
+                # file deleted or made unreadable since then is listed without a FILE block
+                if content is None:
+                    if verbose: print(f"Listed in tree but not written (unreadable since scan): {rel_path}")
+                    missing += 1
+                    continue
+
+                outfile.writelines((
+                    f"FILE: {rel_path}\n{'-' * 20}\n".encode('utf-8'),
+                    content,
+                    b'' if content.endswith(b'\n') else b'\n',
+                    file_footer,
+                ))
+                written += 1
 
     size_mb = os.path.getsize(output_path) / (1024 * 1024)
     # Simple token estimate
     est_tokens = os.path.getsize(output_path) // 4
-    print(f"Success! Saved {len(files)} files to {output_path}")
+    print(f"Success! Saved {written} files to {output_path}")
+    if missing:
+        print(f"Warning: {missing} file(s) in the tree could not be read and have no content")
     print(f"Size: {size_mb:.2f} MB | Est. Tokens: ~{est_tokens:,}")
 
 def main():
@@ -297,26 +542,32 @@ def main():
         target_extensions -= normalize_ext(args.skip.split(','))
 
 
-    files = collect_files(root_dir, target_extensions, ignore_patterns, args.verbose)    
     output_filename = args.output if args.output else f"{dir_name}.txt"
+    paths, sizes, tree = collect_files(root_dir, target_extensions, ignore_patterns, args.verbose, output_filename)
 
     # Safety check for overwrite
     if os.path.exists(output_filename):
+        # Only the first 20 bytes are needed, so skip the buffered/text file objects
         try:
-            with open(output_filename, 'r', encoding='utf-8') as f:
-                header = f.read(20)
+            fd = os.open(output_filename, _READ_FLAGS)
+            try:
+                header = os.read(fd, 20)
+            finally:
+                os.close(fd)
+        except OSError:
+            header = None
             
-            if not header.startswith("Project:"):
-                response = input(f"File '{output_filename}' already exists and doesn't look like a src2file output.\nOverwrite? [y/N]: ")
-                if response.lower() != 'y':
-                    print("Aborted.")
-                    sys.exit(0)
-        except Exception:
+        if header is None:
             response = input(f"File '{output_filename}' already exists.\nOverwrite? [y/N]: ")
             if response.lower() != 'y':
                 sys.exit(0)
+        elif not header.startswith(b"Project:"):
+            response = input(f"File '{output_filename}' already exists and doesn't look like a src2file output.\nOverwrite? [y/N]: ")
+            if response.lower() != 'y':
+                print("Aborted.")
+                sys.exit(0)
 
-    save_to_file(files, output_filename, dir_name)
+    save_to_file(paths, sizes, tree, root_dir, output_filename, dir_name, args.verbose)
 
 if __name__ == "__main__":
     main()
\ No newline at end of file